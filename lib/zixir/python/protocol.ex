@@ -149,6 +149,11 @@ defmodule Zixir.Python.Protocol do
   @doc """
   Decode numpy array info from Python to Elixir list.
   """
+  def decode_numpy_array(%{"dtype" => "str", "data" => data}) do
+    # String/object arrays arrive as nested lists, already shaped
+    wire_to_elixir(data)
+  end
+
   def decode_numpy_array(arr_info) when is_map(arr_info) do
     dtype = arr_info["dtype"]
     shape = arr_info["shape"]
@@ -160,6 +165,7 @@ defmodule Zixir.Python.Protocol do
       "f32" -> decode_float32_array(data)
       "i64" -> decode_int64_array(data)
       "i32" -> decode_int32_array(data)
+      "b1" -> decode_bool_array(data, arr_info["nbits"])
       _ -> decode_float64_array(data)
     end
     
@@ -185,6 +191,12 @@ defmodule Zixir.Python.Protocol do
     for <<value::native-signed-32 <- data>>, do: value
   end
 
+  defp decode_bool_array(data, nbits) do
+    # Packed MSB-first by np.packbits; trailing pad bits are dropped
+    bits = for <<bit::1 <- data>>, do: bit == 1
+    Enum.take(bits, nbits)
+  end
+
   defp reshape_if_needed(values, [_dim1]) do
     # 1D array - already correct shape
     values
@@ -4,12 +4,18 @@ Zixir Python specialist: enhanced port bridge.
 Reads JSON lines from stdin, dispatches to module.function(*args), writes JSON line to stdout.
 Supports numpy arrays, pandas DataFrames, and efficient data serialization.
 """
+import enum
+import os
+import re
 import sys
 import json
+import math
 import importlib
-import traceback
-import base64
-import struct
+import importlib.util
+import io
+import tempfile
+import time
+import uuid
 
 # Optional imports - handle gracefully if not available
 try:
@@ -24,43 +30,308 @@ try:
 except ImportError:
     PANDAS_AVAILABLE = False
 
+# pyarrow and blosc2 take longer to import than the rest of start-up; the
+# ready signal only needs to know they are installed, and _load_pyarrow and
+# _load_blosc2 import them on first use
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+pa = None
 
-def wire_to_python(obj):
-    """Convert wire (JSON-like) to native Python with special type handling."""
+BLOSC2_AVAILABLE = importlib.util.find_spec("blosc2") is not None
+blosc2 = None
+
+# Fast JSON codec: orjson parses/encodes in C and works on bytes directly.
+# _loads takes str or bytes; _dumps always returns bytes.
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Stdlib encoder without padding spaces or cycle tracking (python_to_wire always
+# produces a tree). Output stays ASCII: this is also the fallback for strings
+# orjson rejects, such as lone surrogates, which UTF-8 cannot encode.
+_json_encoder = json.JSONEncoder(separators=(',', ':'), check_circular=False, allow_nan=False)
+
+
+def _stdlib_dumps(obj):
+    try:
+        return _json_encoder.encode(obj).encode('ascii')
+    except ValueError:
+        # NaN and infinities are not JSON; send null for them, as orjson does
+        return _json_encoder.encode(_finite_floats(obj)).encode('ascii')
+
+
+def _finite_floats(obj):
+    """Copy a JSON-ready tree with NaN and infinities replaced by None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
     if isinstance(obj, dict):
-        # Check for special type markers
-        if "__numpy_array__" in obj and NUMPY_AVAILABLE:
-            return decode_numpy_array(obj["__numpy_array__"])
-        elif "__pandas_df__" in obj and PANDAS_AVAILABLE:
-            return decode_pandas_df(obj["__pandas_df__"])
-        elif "__bytes__" in obj:
-            return base64.b64decode(obj["__bytes__"])
-        else:
-            return {k: wire_to_python(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [wire_to_python(x) for x in obj]
-    else:
+        return {k: _finite_floats(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite_floats(v) for v in obj]
+    return obj
+
+
+if ORJSON_AVAILABLE:
+    # Datetimes and dataclasses go through python_to_wire (str()) as they always
+    # have. Dicts with non-str keys make orjson fail and take the stdlib path,
+    # which stringifies keys the python_to_wire way. Enums are always encoded
+    # natively by orjson, as their value; python_to_wire does the same so the
+    # result does not depend on which path encoded it.
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+
+    def _dumps(obj):
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            # orjson rejects integers wider than 64 bits; the stdlib encoder does not
+            return _stdlib_dumps(obj)
+else:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+    _dumps = _stdlib_dumps
+
+# Base64 codec: pybase64 uses SIMD encode/decode and returns str in one step
+try:
+    import pybase64
+
+    def _b64encode(raw):
+        return pybase64.b64encode_as_string(raw)
+
+    def _b64decode(data):
+        return pybase64.b64decode(data, validate=False)
+except ImportError:
+    import base64
+
+    def _b64encode(raw):
+        return base64.b64encode(raw).decode('ascii')
+
+    def _b64decode(data):
+        return base64.b64decode(data)
+
+# Optional wire extensions a caller may accept by listing them in the request's
+# "x" field. "bin": numpy arrays in the response are sent as raw bytes after the
+# JSON line instead of base64 (see _queue_binary). "blosc2": large numpy arrays
+# are blosc2-compressed before base64 (see encode_numpy_array). "mmap": very
+# large numpy arrays are handed over as a file in shared memory (see
+# encode_numpy_mmap); the caller must be on the same host. "arrow": pandas
+# DataFrames are sent as an Arrow IPC stream (see encode_arrow_df).
+WIRE_EXTENSIONS = []
+if NUMPY_AVAILABLE:
+    WIRE_EXTENSIONS.append("bin")
+    if BLOSC2_AVAILABLE:
+        WIRE_EXTENSIONS.append("blosc2")
+    WIRE_EXTENSIONS.append("mmap")
+if PANDAS_AVAILABLE and ARROW_AVAILABLE:
+    WIRE_EXTENSIONS.append("arrow")
+
+# Arrays smaller than this are not worth blosc2's fixed per-call overhead
+BLOSC2_MIN_BYTES = 64 * 1024
+
+
+def _load_blosc2():
+    global blosc2
+    if blosc2 is None:
+        if not BLOSC2_AVAILABLE:
+            raise ImportError("blosc2 not available")
+        import blosc2
+    return blosc2
+
+# Arrays larger than this go through shared memory when "mmap" is accepted
+MMAP_MIN_BYTES = int(os.environ.get("ZIXIR_MMAP_MIN_BYTES", 16 * 1024 * 1024))
+MMAP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# File names encode_numpy_mmap creates; inbound paths must be exactly these
+_MMAP_NAME = re.compile(r"zixir-[0-9a-f]{32}\.bin")
+
+# Wire dtype codes, keyed by full (native byte order) dtype
+if NUMPY_AVAILABLE:
+    _DTYPE_TO_CODE = {
+        np.dtype(np.float64): 'f64', np.dtype(np.float32): 'f32',
+        np.dtype(np.int64): 'i64', np.dtype(np.int32): 'i32',
+        np.dtype(np.int16): 'i16', np.dtype(np.int8): 'i8',
+        np.dtype(np.uint64): 'u64', np.dtype(np.uint32): 'u32',
+        np.dtype(np.uint16): 'u16', np.dtype(np.uint8): 'u8',
+    }
+    _CODE_TO_DTYPE = {code: dtype for dtype, code in _DTYPE_TO_CODE.items()}
+
+# Per-request state: extensions the caller accepts, arrays queued for the
+# outgoing binary frames, arrays read from the incoming binary frames, and
+# shared-memory files written for the response
+_wire_ext = frozenset()
+_pending_buffers = []
+_inbound_buffers = {}
+_mmap_files = []
+
+
+def _special_marker(obj):
+    """Return the special type marker key of a wire dict, or None."""
+    if len(obj) == 1:
+        # Tagged values are single-key dicts: one probe instead of a scan
+        key = next(iter(obj))
+        return key if key in _WIRE_DECODERS else None
+    for key in _WIRE_DECODERS:
+        if key in obj:
+            return key
+    return None
+
+
+def wire_to_python(obj):
+    """Convert wire (JSON-like) to native Python with special type handling.
+    
+    Containers are rebuilt from an explicit stack rather than by recursion,
+    so deeply nested payloads cannot hit the recursion limit.
+    """
+    if type(obj) is not dict and type(obj) is not list:
         return obj
+    
+    root = [None]
+    stack = [(root, 0, obj)]
+    while stack:
+        parent, slot, value = stack.pop()
+        if type(value) is dict:
+            marker = _special_marker(value)
+            if marker is not None:
+                parent[slot] = _WIRE_DECODERS[marker](value[marker])
+                continue
+            converted = dict(value)
+            for k, v in value.items():
+                if type(v) is dict or type(v) is list:
+                    stack.append((converted, k, v))
+        else:
+            converted = list(value)
+            for i, v in enumerate(value):
+                if type(v) is dict or type(v) is list:
+                    stack.append((converted, i, v))
+        parent[slot] = converted
+    
+    return root[0]
+
+
+# numpy dtype kinds with no wire dtype code (unicode, bytes, object, void,
+# complex, datetime, timedelta); these arrays travel as nested JSON lists under
+# dtype "str"
+_LIST_KINDS = frozenset('USOVcMm')
+
+# Of those, datetime/timedelta are sent as their ISO strings
+_TIME_KINDS = frozenset('Mm')
+
+# numpy dtype kinds that can be sent as raw binary frames
+_FRAMED_KINDS = frozenset('iuf')
+
+# Exact types that need no conversion on the wire
+_SCALAR_TYPES = frozenset((int, float, str, bool, type(None)))
+
+
+def _wire_identity(obj):
+    return obj
+
+
+def _wire_bytes(obj):
+    return {"__bytes__": _b64encode(obj)}
+
+
+def _wire_sequence(obj):
+    # Flat scalar lists are already wire-ready; skip the per-element recursion
+    if all(type(x) in _SCALAR_TYPES for x in obj):
+        return obj if type(obj) is list else list(obj)
+    return [python_to_wire(x) for x in obj]
+
+
+def _wire_dict(obj):
+    return {k if type(k) is str else str(k): python_to_wire(v) for k, v in obj.items()}
+
+
+def _wire_numpy_scalar(obj):
+    # Same values as the array encoding: numbers become Python numbers, bytes
+    # stay bytes and everything else (datetimes, complex, ...) is sent as str()
+    kind = obj.dtype.kind
+    if kind in 'biuf':
+        value = obj.item()
+        if isinstance(value, np.generic):
+            # longdouble has no Python type; arrays of it are sent as float64
+            return float(value)
+        return value
+    if kind == 'S':
+        return _wire_bytes(bytes(obj))
+    return str(obj)
+
+
+def _wire_ndarray(obj):
+    return encode_numpy_value(obj)
+
+
+def _wire_series(obj):
+    return encode_numpy_value(obj.values)
+
+
+def _wire_dataframe(obj):
+    if "arrow" in _wire_ext:
+        pa = _load_pyarrow()
+        try:
+            return {"__arrow__": encode_arrow_df(obj)}
+        except pa.ArrowException:
+            # Columns Arrow cannot type (e.g. mixed objects) still fit the generic format
+            pass
+    return {"__pandas_df__": encode_pandas_df(obj)}
+
+
+# Exact-type handlers for the common cases; a dict lookup on type(obj) is
+# much cheaper than walking the isinstance ladder below
+_WIRE_DISPATCH = {
+    int: _wire_identity,
+    float: _wire_identity,
+    str: _wire_identity,
+    bool: _wire_identity,
+    type(None): _wire_identity,
+    bytes: _wire_bytes,
+    list: _wire_sequence,
+    tuple: _wire_sequence,
+    dict: _wire_dict,
+}
+
+# numpy/pandas classes are matched by exact type too, so values that are
+# neither never pay for isinstance checks against them
+if NUMPY_AVAILABLE:
+    _WIRE_DISPATCH[np.ndarray] = _wire_ndarray
+    # Every scalar type, not only those with a wire code: _wire_numpy_scalar
+    # handles all kinds (datetime64, complex, bytes_, longdouble, ...)
+    for _code in np.typecodes['All']:
+        _scalar_type = np.dtype(_code).type
+        if _scalar_type is not np.object_:
+            _WIRE_DISPATCH[_scalar_type] = _wire_numpy_scalar
+if PANDAS_AVAILABLE:
+    _WIRE_DISPATCH[pd.DataFrame] = _wire_dataframe
+    _WIRE_DISPATCH[pd.Series] = _wire_series
 
 
 def python_to_wire(obj):
     """Convert Python objects to JSON-serializable format with special handling."""
-    if obj is None:
-        return None
+    handler = _WIRE_DISPATCH.get(type(obj))
+    if handler is not None:
+        return handler(obj)
+    
+    # Subclasses and special types
+    if NUMPY_AVAILABLE and isinstance(obj, np.generic):
+        return _wire_numpy_scalar(obj)
+    elif isinstance(obj, enum.Enum):
+        return python_to_wire(obj.value)
     elif isinstance(obj, (int, float, str, bool)):
         return obj
     elif isinstance(obj, bytes):
-        return {"__bytes__": base64.b64encode(obj).decode('ascii')}
+        return _wire_bytes(obj)
     elif isinstance(obj, (list, tuple)):
-        return [python_to_wire(x) for x in obj]
+        return _wire_sequence(obj)
     elif isinstance(obj, dict):
-        return {str(k): python_to_wire(v) for k, v in obj.items()}
+        return _wire_dict(obj)
     elif NUMPY_AVAILABLE and isinstance(obj, np.ndarray):
-        return {"__numpy_array__": encode_numpy_array(obj)}
+        return _wire_ndarray(obj)
     elif PANDAS_AVAILABLE and isinstance(obj, pd.DataFrame):
-        return {"__pandas_df__": encode_pandas_df(obj)}
+        return _wire_dataframe(obj)
     elif PANDAS_AVAILABLE and isinstance(obj, pd.Series):
-        return {"__numpy_array__": encode_numpy_array(obj.values)}
+        return _wire_series(obj)
     elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
         try:
             return [python_to_wire(x) for x in obj]
@@ -70,22 +341,171 @@ def python_to_wire(obj):
         return str(obj)
 
 
+def numpy_dtype_code(arr):
+    """Return the wire dtype code for a numpy array."""
+    return _DTYPE_TO_CODE.get(arr.dtype, 'f64')
+
+
+def as_wire_dtype(arr):
+    """Return an int/uint/float array in a dtype that has a wire code.
+    
+    Byte-swapped arrays are converted to native order; floats without a
+    code (float16, longdouble) become float64 so the raw bytes match the
+    'f64' they are labelled with. Other kinds never get here: they take
+    the list path in encode_numpy_array.
+    """
+    if arr.dtype in _DTYPE_TO_CODE:
+        return arr
+    native = arr.dtype.newbyteorder('=')
+    if native in _DTYPE_TO_CODE:
+        return arr.astype(native)
+    if arr.dtype.kind == 'f':
+        return arr.astype(np.float64)
+    raise TypeError(f"numpy dtype {arr.dtype} has no wire code")
+
+
+def numpy_dtype(dtype_code):
+    """Return the numpy dtype for a wire dtype code; unknown codes raise."""
+    try:
+        return _CODE_TO_DTYPE[dtype_code]
+    except (KeyError, TypeError):
+        raise ValueError(f"unknown numpy dtype code: {dtype_code!r}") from None
+
+
+def numpy_from_bytes(raw_bytes, dtype_code, shape):
+    """Rebuild a numpy array from raw bytes, a wire dtype code and a shape."""
+    dtype = numpy_dtype(dtype_code)
+    shape = tuple(shape)
+    
+    arr = np.frombuffer(raw_bytes, dtype=dtype)
+    if shape and shape != arr.shape:
+        arr = arr.reshape(shape)
+    
+    return arr
+
+
+def encode_numpy_value(arr):
+    """Encode numpy array as a shared-memory file, a binary frame reference or inline base64."""
+    if "mmap" in _wire_ext and arr.dtype.kind in _FRAMED_KINDS and arr.nbytes > MMAP_MIN_BYTES:
+        info = encode_numpy_mmap(arr)
+        if info is not None:
+            return {"__numpy_mmap__": info}
+    if "bin" in _wire_ext and arr.dtype.kind in _FRAMED_KINDS:
+        return {"__bin_ref__": _queue_binary(arr)}
+    return {"__numpy_array__": encode_numpy_array(arr)}
+
+
+def _queue_binary(arr):
+    """Queue array for the outgoing binary frames and return its frame id."""
+    arr = np.ascontiguousarray(as_wire_dtype(arr))
+    _pending_buffers.append(arr)
+    return len(_pending_buffers) - 1
+
+
+def encode_numpy_mmap(arr):
+    """Write array to a fresh file under MMAP_DIR and return its wire info.
+    
+    The reader maps the file and is responsible for removing it. Returns
+    None if the file cannot be written (e.g. MMAP_DIR is full), so the
+    array goes out another way. The space is allocated up front: writing
+    through a memmap of a sparse file would turn a full tmpfs into a
+    SIGBUS instead of an OSError.
+    """
+    arr = np.ascontiguousarray(as_wire_dtype(arr))
+    path = os.path.join(MMAP_DIR, f"zixir-{uuid.uuid4().hex}.bin")
+    try:
+        with open(path, "xb") as f:
+            _mmap_files.append(path)
+            if arr.nbytes and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, arr.nbytes)
+            f.write(arr.data)
+    except OSError:
+        if path in _mmap_files:
+            _mmap_files.remove(path)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return None
+    
+    return {
+        "path": path,
+        "dtype": numpy_dtype_code(arr),
+        "shape": arr.shape
+    }
+
+
+def decode_numpy_mmap(arr_info):
+    """Map an array file written by encode_numpy_mmap (read-only, no copy).
+    
+    The file is unlinked once mapped, so only callers that opted in to
+    "mmap" may send one, and only bridge-style files under MMAP_DIR are
+    accepted.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy not available")
+    if "mmap" not in _wire_ext:
+        raise ValueError('__numpy_mmap__ requires "mmap" in the request\'s "x" field')
+    
+    path = os.path.realpath(arr_info["path"])
+    if (os.path.dirname(path) != os.path.realpath(MMAP_DIR)
+            or not _MMAP_NAME.fullmatch(os.path.basename(path))):
+        raise ValueError(f"refusing mmap path outside {MMAP_DIR}: {arr_info['path']}")
+    dtype = numpy_dtype(arr_info["dtype"])
+    arr = np.memmap(path, mode='r', dtype=dtype, shape=tuple(arr_info["shape"]))
+    
+    # The mapping outlives the directory entry on POSIX; elsewhere the file is left behind
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    
+    return arr
+
+
 def encode_numpy_array(arr):
     """Encode numpy array to compact base64 format."""
-    dtype_map = {
-        np.float64: 'f64', np.float32: 'f32',
-        np.int64: 'i64', np.int32: 'i32',
-        np.int16: 'i16', np.int8: 'i8',
-        np.uint64: 'u64', np.uint32: 'u32',
-        np.uint16: 'u16', np.uint8: 'u8',
-    }
+    if arr.dtype.kind in _LIST_KINDS:
+        if arr.dtype.kind in _TIME_KINDS:
+            arr = arr.astype(str)
+        return {
+            "dtype": "str",
+            "shape": arr.shape,
+            "data": python_to_wire(arr.tolist())
+        }
+    
+    if arr.dtype == np.bool_:
+        # One bit per element instead of one byte; nbits trims the padding on decode
+        packed = np.packbits(arr.ravel())
+        return {
+            "dtype": "b1",
+            "shape": arr.shape,
+            "nbits": arr.size,
+            "data": _b64encode(packed.data)
+        }
     
-    dtype_str = dtype_map.get(arr.dtype.type, 'f64')
+    arr = as_wire_dtype(arr)
+    dtype_str = numpy_dtype_code(arr)
     shape = arr.shape
     
-    # Convert to bytes and base64 encode
-    raw_bytes = arr.tobytes()
-    encoded = base64.b64encode(raw_bytes).decode('ascii')
+    # Base64 encode straight from the array buffer; only non-contiguous arrays need a copy
+    raw_bytes = arr.data if arr.flags['C_CONTIGUOUS'] else np.ascontiguousarray(arr).data
+    if "blosc2" in _wire_ext and arr.nbytes > BLOSC2_MIN_BYTES:
+        blosc2 = _load_blosc2()
+        compressed = blosc2.compress2(
+            raw_bytes,
+            typesize=arr.dtype.itemsize,
+            codec=blosc2.Codec.LZ4,
+            filters=[blosc2.Filter.SHUFFLE],
+        )
+        return {
+            "dtype": dtype_str,
+            "shape": shape,
+            "codec": "blosc2",
+            "data": _b64encode(compressed)
+        }
+    
+    encoded = _b64encode(raw_bytes)
     
     return {
         "dtype": dtype_str,
@@ -94,29 +514,254 @@ def encode_numpy_array(arr):
     }
 
 
+def _array_from_nested(data, shape):
+    """Rebuild a "str" array from nested lists, honouring the sent shape.
+    
+    The lists are flattened to the sent number of dimensions first, so
+    elements that are lists themselves stay whole. np.array only picks the
+    dtype when all elements share one type; mixed elements go into an
+    object array rather than being coerced (e.g. to strings).
+    """
+    if 0 in shape:
+        return np.empty(shape, dtype=np.str_)
+    items = data if shape else [data]
+    for _ in shape[1:]:
+        items = [item for row in items for item in row]
+    if len(items) != np.prod(shape):
+        raise ValueError(f"array data does not match shape {list(shape)}")
+    
+    if len({type(item) for item in items}) == 1:
+        try:
+            arr = np.array(items)
+        except ValueError:
+            # Ragged elements
+            arr = None
+        if arr is not None and arr.shape == (len(items),):
+            return arr.reshape(shape)
+    
+    out = np.empty(len(items), dtype=object)
+    for i, item in enumerate(items):
+        out[i] = item
+    return out.reshape(shape)
+
+
 def decode_numpy_array(arr_info):
     """Decode numpy array from compact base64 format."""
     if not NUMPY_AVAILABLE:
         raise ImportError("numpy not available")
     
-    dtype_map = {
-        'f64': np.float64, 'f32': np.float32,
-        'i64': np.int64, 'i32': np.int32,
-        'i16': np.int16, 'i8': np.int8,
-        'u64': np.uint64, 'u32': np.uint32,
-        'u16': np.uint16, 'u8': np.uint8,
-    }
+    if arr_info["dtype"] == "str":
+        return _array_from_nested(wire_to_python(arr_info["data"]), tuple(arr_info["shape"]))
     
-    dtype = dtype_map.get(arr_info["dtype"], np.float64)
-    shape = tuple(arr_info["shape"])
-    raw_bytes = base64.b64decode(arr_info["data"])
+    raw_bytes = _b64decode(arr_info["data"])
+    if arr_info["dtype"] == "b1":
+        bits = np.unpackbits(np.frombuffer(raw_bytes, dtype=np.uint8), count=arr_info["nbits"])
+        return bits.astype(np.bool_).reshape(tuple(arr_info["shape"]))
+    if arr_info.get("codec") == "blosc2":
+        raw_bytes = _load_blosc2().decompress2(raw_bytes)
+    return numpy_from_bytes(raw_bytes, arr_info["dtype"], arr_info["shape"])
+
+
+def read_binary_frames(stream, frames):
+    """Read the raw array frames announced in a request's "__bin__" header.
     
-    # Reconstruct array
-    arr = np.frombuffer(raw_bytes, dtype=dtype)
-    if shape:
-        arr = arr.reshape(shape)
+    Frames follow the JSON line back to back, in header order, each exactly
+    "nbytes" long. Returns {frame id: numpy array}.
     
-    return arr
+    All declared bytes are consumed before anything is decoded, so a frame
+    that fails to decode (bad dtype or shape) leaves the stream in sync for
+    the next request. Only a header without a usable "nbytes" cannot be
+    skipped.
+    """
+    if not isinstance(frames, list) or not all(isinstance(frame, dict) for frame in frames):
+        raise ValueError("__bin__ must be a list of frame headers")
+    sizes = []
+    for frame in frames:
+        nbytes = frame.get("nbytes")
+        if type(nbytes) is not int or nbytes < 0:
+            raise ValueError(f"binary frame {frame.get('id')!r} has invalid nbytes: {nbytes!r}")
+        sizes.append(nbytes)
+    
+    payloads = []
+    for frame, nbytes in zip(frames, sizes):
+        raw_bytes = stream.read(nbytes)
+        if len(raw_bytes) != nbytes:
+            raise EOFError(f"truncated binary frame {frame.get('id')!r}: expected {nbytes} bytes, got {len(raw_bytes)}")
+        payloads.append(raw_bytes)
+    
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy not available")
+    
+    arrays = {}
+    for frame, raw_bytes in zip(frames, payloads):
+        if "id" not in frame:
+            raise ValueError("binary frame header without id")
+        arrays[frame["id"]] = numpy_from_bytes(raw_bytes, frame.get("dtype"), frame.get("shape", ()))
+    return arrays
+
+
+class InputReader:
+    """Line and frame reader over a raw file descriptor.
+    
+    Unlike sys.stdin.buffer it can tell whether another request line has
+    already been read in, which main() uses to batch responses.
+    """
+    
+    def __init__(self, fd, chunk_size=65536):
+        self._fd = fd
+        self._raw = io.FileIO(fd, "rb", closefd=False)
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._eof = False
+    
+    def _fill(self, size):
+        chunk = os.read(self._fd, size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+    
+    def readline(self):
+        start = 0
+        while True:
+            end = self._buf.find(b"\n", start)
+            if end >= 0:
+                line = bytes(self._buf[:end + 1])
+                del self._buf[:end + 1]
+                return line
+            start = len(self._buf)
+            if self._eof or not self._fill(self._chunk_size):
+                line = bytes(self._buf)
+                self._buf.clear()
+                return line
+    
+    def read(self, size):
+        """Read exactly size bytes (fewer only at EOF) into a new bytearray.
+        
+        Bytes beyond what is already buffered go straight from the pipe into
+        the returned buffer, which np.frombuffer then wraps without a copy.
+        """
+        if len(self._buf) >= size:
+            data = self._buf[:size]
+            del self._buf[:size]
+            return data
+        data = bytearray(size)
+        filled = len(self._buf)
+        data[:filled] = self._buf
+        self._buf.clear()
+        with memoryview(data) as view:
+            while filled < size and not self._eof:
+                count = self._raw.readinto(view[filled:])
+                if not count:
+                    self._eof = True
+                    break
+                filled += count
+        if filled < size:
+            del data[filled:]
+        return data
+    
+    def has_buffered_line(self):
+        """True if a complete line is already buffered (no read needed)."""
+        return b"\n" in self._buf
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+def _wire_default(obj):
+    """orjson default hook: convert only what orjson cannot encode itself."""
+    return python_to_wire(obj)
+
+
+def encode_result(result):
+    """Encode a result value to JSON bytes, converting special types.
+    
+    With orjson, dicts, lists and scalars are walked once, in C, and only
+    the other types reach python_to_wire through the default hook. Values
+    orjson rejects (ints wider than 64 bits, float subclasses, ...) are
+    converted with python_to_wire up front and encoded by the stdlib.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(result, default=_wire_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Frames and files from the failed pass are produced again below
+            discard_encoded()
+    return _stdlib_dumps(python_to_wire(result))
+
+
+def discard_encoded():
+    """Drop the binary frames and remove the shared-memory files queued so far."""
+    _pending_buffers.clear()
+    for path in _mmap_files:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    _mmap_files.clear()
+
+
+def encode_response(out):
+    """Encode a response dict to a JSON line (without the newline).
+    
+    An "ok" value is converted to wire format here. When arrays were
+    queued for binary frames, the line carries a "__bin__" header listing
+    {"id", "dtype", "shape", "nbytes"} per frame.
+    """
+    if "ok" not in out:
+        return _dumps(out)
+    
+    line = b'{"ok":' + encode_result(out["ok"])
+    if _pending_buffers:
+        frames = [
+            {"id": i, "dtype": numpy_dtype_code(arr), "shape": arr.shape, "nbytes": arr.nbytes}
+            for i, arr in enumerate(_pending_buffers)
+        ]
+        line += b',"__bin__":' + _dumps(frames)
+    return line + b'}'
+
+
+def write_response(stream, out, batch):
+    """Add a response to the outgoing batch of response lines.
+    
+    Binary frames are not copied into the batch: the batch is written out
+    and the frames follow straight from the array memory.
+    """
+    try:
+        line = encode_response(out)
+    except Exception as e:
+        discard_encoded()
+        line = _dumps({"error": f"{type(e).__name__}: {str(e)}"})
+    
+    batch += line
+    batch += b"\n"
+    if _pending_buffers:
+        stream.write(batch)
+        batch.clear()
+        for arr in _pending_buffers:
+            stream.write(memoryview(arr))
+
+
+# Batching limits: responses are held only while the next request is already
+# buffered, and never beyond these counts, sizes or delays
+BATCH_MAX_RESPONSES = 32
+BATCH_MAX_BYTES = 64 * 1024
+BATCH_MAX_DELAY = 0.002
+
+
+def flush_responses(stream, batch):
+    """Write the batched response lines and flush in one go."""
+    if batch:
+        stream.write(batch)
+        batch.clear()
+    stream.flush()
 
 
 def encode_pandas_df(df):
@@ -144,80 +789,252 @@ def decode_pandas_df(df_info):
     return df
 
 
-def main():
-    # Ensure stdout is line-buffered for proper communication
+def _load_pyarrow():
+    global pa
+    if pa is None:
+        if not ARROW_AVAILABLE:
+            raise ImportError("pyarrow not available")
+        import pyarrow as pa
+    return pa
+
+
+def encode_arrow_df(df):
+    """Encode pandas DataFrame as a base64 Arrow IPC stream.
+    
+    Columns keep their own dtypes (no upcast to a common object array)
+    and the index travels in the schema metadata.
+    """
+    pa = _load_pyarrow()
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return _b64encode(sink.getvalue())
+
+
+def decode_arrow_df(data):
+    """Decode pandas DataFrame from a base64 Arrow IPC stream."""
+    pa = _load_pyarrow()
+    reader = pa.ipc.open_stream(pa.py_buffer(_b64decode(data)))
+    return reader.read_all().to_pandas()
+
+
+def _inbound_buffer(frame_id):
+    return _inbound_buffers[frame_id]
+
+
+# Special type markers understood by wire_to_python, in priority order
+_WIRE_DECODERS = {}
+if NUMPY_AVAILABLE:
+    _WIRE_DECODERS["__numpy_array__"] = decode_numpy_array
+if PANDAS_AVAILABLE:
+    _WIRE_DECODERS["__pandas_df__"] = decode_pandas_df
+    _WIRE_DECODERS["__arrow__"] = decode_arrow_df
+_WIRE_DECODERS["__bytes__"] = _b64decode
+_WIRE_DECODERS["__bin_ref__"] = _inbound_buffer
+if NUMPY_AVAILABLE:
+    _WIRE_DECODERS["__numpy_mmap__"] = decode_numpy_mmap
+
+
+# Imported modules and resolved functions, reused across requests
+_MOD_CACHE = {}
+_FN_CACHE = {}
+
+
+def resolve_function(mod_name, func_name):
+    """Return mod_name.func_name, importing and looking it up only on first use."""
+    key = (mod_name, func_name)
+    fn = _FN_CACHE.get(key)
+    if fn is None:
+        mod = _MOD_CACHE.get(mod_name)
+        if mod is None:
+            mod = _MOD_CACHE[mod_name] = importlib.import_module(mod_name)
+        fn = _FN_CACHE[key] = getattr(mod, func_name)
+    return fn
+
+
+# numba is imported on the first "jit" request only; it is slow to import
+_numba = None
+_NUMBA_MISSING = object()
+_numba_errors = ()
+
+# (module, function) -> numba-compiled function, or the plain function when
+# numba is missing or cannot compile it
+_JIT_CACHE = {}
+
+
+def _load_numba():
+    global _numba, _numba_errors
+    if _numba is None:
+        try:
+            import numba
+            import warnings
+            # Warnings go to stderr, which the port merges into the response stream
+            warnings.filterwarnings("ignore", category=numba.NumbaWarning)
+            # Compile failures; not all of them derive from NumbaError
+            _numba_errors = (numba.NumbaError,)
+            unsupported = getattr(numba.core.errors, "UnsupportedBytecodeError", None)
+            if unsupported is not None:
+                _numba_errors += (unsupported,)
+            _numba = numba
+        except ImportError:
+            _numba = _NUMBA_MISSING
+    return None if _numba is _NUMBA_MISSING else _numba
+
+
+def call_jit(mod_name, func_name, fn, args, kwargs):
+    """Call fn through a cached numba.njit(cache=True) specialization.
+    
+    Opt-in per request ("jit": true) because only numeric functions
+    compile; anything numba rejects is called as plain Python instead,
+    and remembered so the compile is not retried.
+    """
+    key = (mod_name, func_name)
+    jitted = _JIT_CACHE.get(key)
+    numba = _load_numba()
+    if jitted is None:
+        jitted = fn
+        if numba is not None:
+            try:
+                jitted = numba.njit(cache=True)(fn)
+            except (TypeError, numba.NumbaError):
+                pass
+        _JIT_CACHE[key] = jitted
+    
+    if jitted is fn:
+        return fn(*args, **kwargs)
     try:
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(line_buffering=True)
-    except:
-        pass
+        result = jitted(*args, **kwargs)
+    except _numba_errors:
+        _JIT_CACHE[key] = fn
+        return fn(*args, **kwargs)
+    return _from_numba_typed(result, numba.typed)
+
+
+def _from_numba_typed(value, typed):
+    """Replace numba.typed Dict/List in a jitted result with dict/list.
+    
+    nopython functions that build a dict or list return these typed
+    containers, which would otherwise be sent as a plain iterable.
+    """
+    if isinstance(value, typed.Dict):
+        return {_from_numba_typed(k, typed): _from_numba_typed(v, typed) for k, v in value.items()}
+    if isinstance(value, typed.List):
+        return [_from_numba_typed(item, typed) for item in value]
+    if type(value) is tuple:
+        return tuple(_from_numba_typed(item, typed) for item in value)
+    return value
+
+
+def call_request(req):
+    """Run a module.function request and return the response dict."""
+    mod_name = req.get("m", "")
+    func_name = req.get("f", "")
+    args = wire_to_python(req.get("a", []))
+    kwargs = wire_to_python(req.get("k", {}))
+    
+    if not mod_name or not func_name:
+        return {"error": "missing m or f"}
+    
+    try:
+        fn = resolve_function(mod_name, func_name)
+        
+        # Call function with args and kwargs
+        if req.get("jit"):
+            result = call_jit(mod_name, func_name, fn, args, kwargs)
+        elif kwargs:
+            result = fn(*args, **kwargs)
+        else:
+            result = fn(*args)
+        
+        # Converted to wire format while encoding (see encode_result)
+        return {"ok": result}
+    except ImportError as e:
+        return {"error": f"Module not found: {mod_name} - {str(e)}"}
+    except AttributeError as e:
+        return {"error": f"Function not found: {func_name} in {mod_name} - {str(e)}"}
+    except TypeError as e:
+        return {"error": f"Type error: {str(e)}"}
+    except ValueError as e:
+        return {"error": f"Value error: {str(e)}"}
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {str(e)}"
+        return {"error": error_msg}
+
+
+def main():
+    global _wire_ext
+    
+    # Both directions use the binary layer: requests may be followed by raw
+    # array frames. Responses are batched while the next request has already
+    # been read in, so a burst costs one write + flush instead of one per
+    # request. The batch is always flushed before blocking on more input and
+    # before running user code, whose run time is unknown: a finished response
+    # only ever waits for the command and error responses that follow it.
+    in_stream = InputReader(sys.stdin.fileno())
+    out_stream = sys.stdout.buffer
+    batch = bytearray()
+    batched = 0
+    batch_started = 0.0
     
     # Send ready signal
-    sys.stdout.write(json.dumps({"ready": True, "numpy": NUMPY_AVAILABLE, "pandas": PANDAS_AVAILABLE}) + "\n")
-    sys.stdout.flush()
+    out_stream.write(_dumps({"ready": True, "numpy": NUMPY_AVAILABLE, "pandas": PANDAS_AVAILABLE, "x": WIRE_EXTENSIONS}) + b"\n")
+    out_stream.flush()
     
-    for line in sys.stdin:
-        line = line.strip()
+    # Lines stay bytes end to end: both orjson and json.loads parse bytes directly
+    for raw in in_stream:
+        line = raw.strip()
         if not line:
+            if batch and not in_stream.has_buffered_line():
+                flush_responses(out_stream, batch)
+                batched = 0
             continue
+        _wire_ext = frozenset()
+        _pending_buffers.clear()
+        _inbound_buffers.clear()
+        _mmap_files.clear()
         try:
-            req = json.loads(line)
-            
-            # Handle special commands
-            if "cmd" in req:
-                cmd = req["cmd"]
-                if cmd == "ping":
-                    sys.stdout.write(json.dumps({"ok": "pong"}) + "\n")
-                    sys.stdout.flush()
-                    continue
-                elif cmd == "health":
-                    health = {
-                        "ok": True,
-                        "numpy": NUMPY_AVAILABLE,
-                        "pandas": PANDAS_AVAILABLE,
-                        "python_version": sys.version_info[:2]
-                    }
-                    sys.stdout.write(json.dumps({"ok": health}) + "\n")
-                    sys.stdout.flush()
-                    continue
+            req = _loads(line)
             
-            mod_name = req.get("m", "")
-            func_name = req.get("f", "")
-            args = wire_to_python(req.get("a", []))
-            kwargs = wire_to_python(req.get("k", {}))
+            # Raw array frames follow the request line; consume them before anything else
+            if "__bin__" in req:
+                _inbound_buffers.update(read_binary_frames(in_stream, req["__bin__"]))
+            _wire_ext = frozenset(req.get("x", ()))
             
-            if not mod_name or not func_name:
-                out = {"error": "missing m or f"}
+            # Handle special commands
+            cmd = req.get("cmd")
+            if cmd == "ping":
+                out = {"ok": "pong"}
+            elif cmd == "health":
+                health = {
+                    "ok": True,
+                    "numpy": NUMPY_AVAILABLE,
+                    "pandas": PANDAS_AVAILABLE,
+                    "python_version": sys.version_info[:2]
+                }
+                out = {"ok": health}
             else:
-                try:
-                    mod = importlib.import_module(mod_name)
-                    fn = getattr(mod, func_name)
-                    
-                    # Call function with args and kwargs
-                    if kwargs:
-                        result = fn(*args, **kwargs)
-                    else:
-                        result = fn(*args)
-                    
-                    out = {"ok": python_to_wire(result)}
-                except ImportError as e:
-                    out = {"error": f"Module not found: {mod_name} - {str(e)}"}
-                except AttributeError as e:
-                    out = {"error": f"Function not found: {func_name} in {mod_name} - {str(e)}"}
-                except TypeError as e:
-                    out = {"error": f"Type error: {str(e)}"}
-                except ValueError as e:
-                    out = {"error": f"Value error: {str(e)}"}
-                except Exception as e:
-                    error_msg = f"{type(e).__name__}: {str(e)}"
-                    out = {"error": error_msg}
-        except json.JSONDecodeError as e:
+                if batch:
+                    flush_responses(out_stream, batch)
+                    batched = 0
+                out = call_request(req)
+        except _JSONDecodeError as e:
             out = {"error": f"Invalid JSON: {str(e)}"}
         except Exception as e:
             out = {"error": f"Bridge error: {str(e)}"}
         
-        sys.stdout.write(json.dumps(out) + "\n")
-        sys.stdout.flush()
+        if not batched:
+            batch_started = time.monotonic()
+        write_response(out_stream, out, batch)
+        batched += 1
+        if (not in_stream.has_buffered_line()
+                or batched >= BATCH_MAX_RESPONSES
+                or len(batch) >= BATCH_MAX_BYTES
+                or time.monotonic() - batch_started >= BATCH_MAX_DELAY):
+            flush_responses(out_stream, batch)
+            batched = 0
+    
+    flush_responses(out_stream, batch)
 
 
 if __name__ == "__main__":
@@ -86,7 +86,7 @@ if (-not (Get-Command erl -ErrorAction SilentlyContinue)) {
     exit 1
 }
 
-Write-Host "Zixir verification: deps.get, zig.get, compile, run example"
+Write-Host "Zixir verification: deps.get, zig.get, compile, Python bridge tests, run example"
 mix deps.get
 if ($LASTEXITCODE -ne 0) { exit 1 }
 mix zig.get
@@ -102,6 +102,16 @@ if (Test-Path $ziglerCache) {
 }
 mix compile
 if ($LASTEXITCODE -ne 0) { exit 1 }
+# Python bridge tests (priv/python/port_bridge.py); skipped when Python is not on PATH
+$python = Get-Command python3 -ErrorAction SilentlyContinue
+if (-not $python) { $python = Get-Command python -ErrorAction SilentlyContinue }
+if ($python) {
+    Write-Host "Running Python bridge tests..."
+    & $python.Source -m unittest discover -s test/python
+    if ($LASTEXITCODE -ne 0) { exit 1 }
+} else {
+    Write-Host "Python not found on PATH; skipping Python bridge tests." -ForegroundColor Yellow
+}
 Write-Host "Running examples/hello.zixir..."
 mix zixir.run examples/hello.zixir
 if ($LASTEXITCODE -ne 0) { exit 1 }
@@ -0,0 +1,190 @@
+"""Round-trip tests driving priv/python/port_bridge.py over a pipe.
+
+Run with: python -m unittest discover -s test/python
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+BRIDGE = os.path.join(os.path.dirname(__file__), "..", "..", "priv", "python", "port_bridge.py")
+
+
+class BridgeProcess:
+    """The bridge as a child process, with helpers to talk to it."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, BRIDGE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        self.ready = self.read_json()
+
+    def send(self, data):
+        self.proc.stdin.write(data)
+        self.proc.stdin.flush()
+
+    def read_json(self):
+        line = self.proc.stdout.readline()
+        if not line:
+            raise EOFError("bridge closed stdout")
+        return json.loads(line)
+
+    def read_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.proc.stdout.read(size - len(data))
+            if not chunk:
+                raise EOFError("bridge closed stdout mid-frame")
+            data += chunk
+        return data
+
+    def close(self):
+        self.proc.stdin.close()
+        rest = self.proc.stdout.read()
+        self.proc.stdout.close()
+        self.proc.wait(timeout=10)
+        return rest
+
+
+def request(**fields):
+    return json.dumps(fields).encode() + b"\n"
+
+
+class PortBridgeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bridge = BridgeProcess()
+
+    def tearDown(self):
+        if self.bridge.proc.poll() is None:
+            self.bridge.close()
+
+    def test_ready_and_call(self):
+        self.assertTrue(self.bridge.ready["ready"])
+        self.bridge.send(b'{"cmd":"ping"}\n')
+        self.assertEqual(self.bridge.read_json(), {"ok": "pong"})
+        self.bridge.send(request(m="math", f="sqrt", a=[4.0]))
+        self.assertEqual(self.bridge.read_json(), {"ok": 2.0})
+
+    def test_errors_keep_the_stream_in_sync(self):
+        self.bridge.send(b"not json\n\n" + request(m="nomod", f="x", a=[]) + request(m="math", f="sqrt", a=[9]))
+        self.assertIn("Invalid JSON", self.bridge.read_json()["error"])
+        self.assertIn("Module not found", self.bridge.read_json()["error"])
+        self.assertEqual(self.bridge.read_json(), {"ok": 3.0})
+
+    def test_burst_answers_every_request_in_order(self):
+        self.bridge.send(b"".join(request(m="math", f="sqrt", a=[i * i]) for i in range(500)))
+        results = [self.bridge.read_json()["ok"] for _ in range(500)]
+        self.assertEqual(results, [float(i) for i in range(500)])
+
+    def test_eof_without_trailing_newline(self):
+        self.bridge.send(request(m="math", f="sqrt", a=[4.0]) + b'{"m":"math","f":"sqrt","a":[16]}')
+        rest = self.bridge.close()
+        lines = [json.loads(line) for line in rest.splitlines()]
+        self.assertEqual(lines, [{"ok": 2.0}, {"ok": 4.0}])
+        self.assertEqual(self.bridge.proc.returncode, 0)
+
+    def test_steady_client_is_not_starved(self):
+        first = []
+        started = time.monotonic()
+
+        def read_first():
+            self.bridge.read_json()
+            first.append(time.monotonic() - started)
+
+        reader = threading.Thread(target=read_first, daemon=True)
+        reader.start()
+        for _ in range(20):
+            self.bridge.send(request(m="time", f="sleep", a=[0.05]))
+            time.sleep(0.02)
+        sending_took = time.monotonic() - started
+        reader.join(timeout=5)
+        self.assertTrue(first, "no response received")
+        self.assertLess(first[0], sending_took)
+
+    def test_response_is_not_held_while_the_next_call_runs(self):
+        started = time.monotonic()
+        self.bridge.send(request(m="math", f="sqrt", a=[4]) + request(m="time", f="sleep", a=[1]))
+        self.assertEqual(self.bridge.read_json(), {"ok": 2.0})
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.bridge.read_json(), {"ok": None})
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+    def test_binary_frames_interleave_with_lines(self):
+        arr = np.arange(6, dtype=np.float64).reshape(2, 3)
+        header = request(
+            m="numpy", f="multiply", a=[{"__bin_ref__": 0}, 2], x=["bin"],
+            __bin__=[{"id": 0, "dtype": "f64", "shape": [2, 3], "nbytes": arr.nbytes}],
+        )
+        self.bridge.send(header + arr.tobytes() + request(m="math", f="sqrt", a=[9]))
+
+        out = self.bridge.read_json()
+        self.assertEqual(out["ok"], {"__bin_ref__": 0})
+        frame = out["__bin__"][0]
+        self.assertEqual((frame["dtype"], frame["shape"]), ("f64", [2, 3]))
+        raw = self.bridge.read_exact(frame["nbytes"])
+        result = np.frombuffer(raw, dtype=np.float64).reshape(frame["shape"])
+        np.testing.assert_array_equal(result, arr * 2)
+
+        self.assertEqual(self.bridge.read_json(), {"ok": 3.0})
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+    def test_frame_larger_than_the_read_chunk(self):
+        arr = np.arange(300_000, dtype=np.int32)
+        header = request(
+            m="numpy", f="sum", a=[{"__bin_ref__": 0}], x=["bin"],
+            __bin__=[{"id": 0, "dtype": "i32", "shape": [arr.size], "nbytes": arr.nbytes}],
+        )
+        writer = threading.Thread(target=self.bridge.send, args=(header + arr.tobytes() + request(m="math", f="sqrt", a=[9]),))
+        writer.start()
+        self.assertEqual(self.bridge.read_json(), {"ok": int(arr.sum())})
+        self.assertEqual(self.bridge.read_json(), {"ok": 3.0})
+        writer.join(timeout=5)
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+    def test_undecodable_frames_keep_the_stream_in_sync(self):
+        bad_shape = request(
+            m="numpy", f="sum", a=[{"__bin_ref__": 0}, {"__bin_ref__": 1}],
+            __bin__=[
+                {"id": 0, "dtype": "f64", "shape": [3], "nbytes": 16},
+                {"id": 1, "dtype": "f64", "shape": [2], "nbytes": 16},
+            ],
+        )
+        bad_dtype = request(
+            m="numpy", f="sum", a=[{"__bin_ref__": 0}],
+            __bin__=[{"id": 0, "dtype": "q99", "shape": [2], "nbytes": 16}],
+        )
+        padding = b"x" * 16
+        self.bridge.send(bad_shape + padding * 2 + bad_dtype + padding + request(m="math", f="sqrt", a=[9]))
+
+        self.assertIn("error", self.bridge.read_json())
+        self.assertIn("unknown numpy dtype code", self.bridge.read_json()["error"])
+        self.assertEqual(self.bridge.read_json(), {"ok": 3.0})
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+    def test_truncated_frame_at_eof(self):
+        header = request(
+            m="numpy", f="sum", a=[{"__bin_ref__": 0}],
+            __bin__=[{"id": 0, "dtype": "f64", "shape": [4], "nbytes": 32}],
+        )
+        self.bridge.send(header + b"\x00" * 10)
+        rest = self.bridge.close()
+        out = json.loads(rest)
+        self.assertIn("truncated binary frame 0", out["error"])
+        self.assertEqual(self.bridge.proc.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
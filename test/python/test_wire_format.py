@@ -0,0 +1,411 @@
+"""In-process tests of priv/python/port_bridge.py: wire encoding and function calls.
+
+Run with: python -m unittest discover -s test/python
+"""
+import errno
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "priv", "python"))
+
+import port_bridge  # noqa: E402
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+
+class WireTestCase(unittest.TestCase):
+    """Runs each test with the given extensions accepted and fresh per-request state."""
+
+    extensions = ()
+
+    def setUp(self):
+        port_bridge._wire_ext = frozenset(self.extensions)
+        self.addCleanup(self.reset_state)
+
+    def reset_state(self):
+        port_bridge._wire_ext = frozenset()
+        port_bridge.discard_encoded()
+        port_bridge._inbound_buffers.clear()
+
+    def round_trip(self, value):
+        """Encode value as a response would be, then decode it as a request."""
+        wire = json.loads(port_bridge.encode_result(value))
+        # Frames queued for the response come back as the request's frames
+        port_bridge._inbound_buffers.update(enumerate(port_bridge._pending_buffers))
+        return port_bridge.wire_to_python(wire)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class StringArrayTest(WireTestCase):
+
+    def test_strings_keep_shape_and_dtype(self):
+        arr = np.array([["a", "bc"], ["d", "e"]])
+        result = self.round_trip(arr)
+        self.assertEqual(result.shape, (2, 2))
+        self.assertEqual(result.dtype.kind, "U")
+        np.testing.assert_array_equal(result, arr)
+
+    def test_empty_array_keeps_shape(self):
+        result = self.round_trip(np.empty((0, 2), dtype="<U1"))
+        self.assertEqual(result.shape, (0, 2))
+        self.assertEqual(result.dtype.kind, "U")
+
+    def test_object_elements_that_are_lists_stay_whole(self):
+        arr = np.empty(2, dtype=object)
+        arr[0] = [1, 2]
+        arr[1] = [3, 4]
+        result = self.round_trip(arr)
+        self.assertEqual(result.shape, (2,))
+        self.assertEqual(result.dtype, object)
+        self.assertEqual(result.tolist(), [[1, 2], [3, 4]])
+
+    def test_mixed_object_elements_keep_their_types(self):
+        arr = np.array([[1, "a"], [2.5, None]], dtype=object)
+        result = self.round_trip(arr)
+        self.assertEqual(result.dtype, object)
+        self.assertEqual(result.tolist(), [[1, "a"], [2.5, None]])
+
+    def test_scalar_array(self):
+        result = self.round_trip(np.array("abc"))
+        self.assertEqual(result.shape, ())
+        self.assertEqual(result.item(), "abc")
+
+    def test_ragged_object_elements(self):
+        arr = np.empty((2, 1), dtype=object)
+        arr[0, 0] = [1]
+        arr[1, 0] = "x"
+        result = self.round_trip(arr)
+        self.assertEqual(result.shape, (2, 1))
+        self.assertEqual(result.tolist(), [[[1]], ["x"]])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class DtypeTest(WireTestCase):
+
+    def assert_round_trip(self, arr, expected_dtype):
+        for extensions in ((), ("bin",)):
+            with self.subTest(extensions=extensions):
+                port_bridge._wire_ext = frozenset(extensions)
+                result = self.round_trip(arr)
+                self.assertEqual(result.dtype, expected_dtype)
+                self.assertEqual(result.shape, arr.shape)
+                np.testing.assert_array_equal(result, arr)
+
+    def test_byte_swapped_arrays_arrive_in_native_order(self):
+        for dtype in (">f8", ">i4", "<u2", ">f4", ">i8"):
+            with self.subTest(dtype=dtype):
+                arr = np.arange(12, dtype=dtype).reshape(3, 4)
+                self.assert_round_trip(arr, np.dtype(dtype).newbyteorder("="))
+
+    def test_float16_is_widened_to_float64(self):
+        arr = np.array([[0.5, -1.25], [np.inf, 65504.0]], dtype=np.float16)
+        self.assert_round_trip(arr, np.float64)
+
+    def test_non_contiguous_array(self):
+        arr = np.arange(20, dtype=np.int32).reshape(4, 5)[:, ::2]
+        self.assert_round_trip(arr, np.int32)
+
+    def test_complex_and_datetime_values_are_kept(self):
+        complex_arr = np.array([1 + 2j, 3 - 0.5j])
+        self.assertEqual(self.round_trip(complex_arr).tolist(), ["(1+2j)", "(3-0.5j)"])
+        dates = np.array(["2024-01-02", "2024-03-04"], dtype="datetime64[D]")
+        self.assertEqual(self.round_trip(dates).tolist(), ["2024-01-02", "2024-03-04"])
+
+
+def _squares(n):
+    out = {}
+    for i in range(n):
+        out[i] = float(i * i)
+    return out, [1, 2]
+
+
+def _total(values):
+    return values.sum()
+
+
+def _describe(value):
+    return repr(value)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE and port_bridge._load_numba() is not None, "numpy or numba not available")
+class JitTest(WireTestCase):
+
+    def setUp(self):
+        super().setUp()
+        port_bridge._JIT_CACHE.clear()
+
+    def test_jitted_result(self):
+        result = port_bridge.call_jit("tests", "total", _total, (np.arange(5.0),), {})
+        self.assertEqual(result, 10.0)
+        self.assertIsNot(port_bridge._JIT_CACHE[("tests", "total")], _total)
+
+    def test_typed_containers_become_dict_and_list(self):
+        result = port_bridge.call_jit("tests", "squares", _squares, (3,), {})
+        self.assertEqual(result, ({0: 0.0, 1: 1.0, 2: 4.0}, [1, 2]))
+        self.assertIs(type(result[0]), dict)
+        self.assertEqual(json.loads(port_bridge.encode_result(result[0])), {"0": 0.0, "1": 1.0, "2": 4.0})
+
+    def test_uncompilable_function_runs_as_python(self):
+        result = port_bridge.call_jit("tests", "describe", _describe, ({"a": 1},), {})
+        self.assertEqual(result, "{'a': 1}")
+        self.assertIs(port_bridge._JIT_CACHE[("tests", "describe")], _describe)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE and port_bridge.BLOSC2_AVAILABLE, "numpy or blosc2 not available")
+class Blosc2Test(WireTestCase):
+
+    extensions = ("blosc2",)
+
+    def test_large_array_is_compressed(self):
+        arr = np.arange(100_000, dtype=np.float64).reshape(500, 200)
+        wire = json.loads(port_bridge.encode_result(arr))
+        self.assertEqual(wire["__numpy_array__"]["codec"], "blosc2")
+        result = port_bridge.wire_to_python(wire)
+        self.assertEqual(result.dtype, arr.dtype)
+        np.testing.assert_array_equal(result, arr)
+
+    def test_small_array_is_not_compressed(self):
+        wire = json.loads(port_bridge.encode_result(np.arange(10)))
+        self.assertNotIn("codec", wire["__numpy_array__"])
+
+    def test_not_compressed_unless_accepted(self):
+        port_bridge._wire_ext = frozenset()
+        wire = json.loads(port_bridge.encode_result(np.arange(100_000, dtype=np.int64)))
+        self.assertNotIn("codec", wire["__numpy_array__"])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class MmapTest(WireTestCase):
+
+    extensions = ("mmap", "bin")
+
+    def setUp(self):
+        super().setUp()
+        self.arr = np.arange(4096, dtype=np.float32).reshape(64, 64)
+        patcher = mock.patch.object(port_bridge, "MMAP_MIN_BYTES", 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bridge_files(self):
+        return {name for name in os.listdir(port_bridge.MMAP_DIR) if name.startswith("zixir-")}
+
+    def test_large_array_goes_through_a_file(self):
+        wire = json.loads(port_bridge.encode_result(self.arr))
+        path = wire["__numpy_mmap__"]["path"]
+        self.assertEqual(os.path.getsize(path), self.arr.nbytes)
+        result = port_bridge.wire_to_python(wire)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_array_equal(result, self.arr)
+
+    def test_falls_back_when_the_directory_is_unusable(self):
+        missing = os.path.join(tempfile.gettempdir(), "zixir-missing-dir", "nested")
+        with mock.patch.object(port_bridge, "MMAP_DIR", missing):
+            wire = json.loads(port_bridge.encode_result(self.arr))
+        self.assertEqual(wire, {"__bin_ref__": 0})
+        self.assertEqual(port_bridge._mmap_files, [])
+
+    @unittest.skipUnless(hasattr(os, "posix_fallocate"), "no posix_fallocate")
+    def test_full_directory_leaves_no_file_behind(self):
+        before = self.bridge_files()
+        full = OSError(errno.ENOSPC, "No space left on device")
+        with mock.patch.object(port_bridge.os, "posix_fallocate", side_effect=full):
+            wire = json.loads(port_bridge.encode_result(self.arr))
+        self.assertEqual(wire, {"__bin_ref__": 0})
+        self.assertEqual(port_bridge._mmap_files, [])
+        self.assertEqual(self.bridge_files(), before)
+
+    def test_refuses_paths_outside_the_directory(self):
+        with self.assertRaises(ValueError):
+            port_bridge.wire_to_python({"__numpy_mmap__": {"path": "/etc/passwd", "dtype": "u8", "shape": [1]}})
+
+
+@unittest.skipUnless(PANDAS_AVAILABLE and port_bridge.ARROW_AVAILABLE, "pandas or pyarrow not available")
+class ArrowTest(WireTestCase):
+
+    extensions = ("arrow",)
+
+    def test_columns_keep_their_dtypes(self):
+        df = pd.DataFrame(
+            {"i": np.arange(3, dtype=np.int16), "f": [0.5, 1.5, np.nan], "s": ["a", "b", "c"]},
+            index=["x", "y", "z"],
+        )
+        wire = json.loads(port_bridge.encode_result(df))
+        self.assertEqual(list(wire), ["__arrow__"])
+        result = self.round_trip(df)
+        pd.testing.assert_frame_equal(result, df, check_dtype=False)
+        self.assertEqual(result["i"].dtype, np.int16)
+
+    def test_falls_back_for_columns_arrow_cannot_type(self):
+        df = pd.DataFrame({"mixed": [1, "a"]})
+        wire = json.loads(port_bridge.encode_result(df))
+        self.assertEqual(list(wire), ["__pandas_df__"])
+        self.assertEqual(self.round_trip(df)["mixed"].tolist(), [1, "a"])
+
+    def test_generic_format_unless_accepted(self):
+        port_bridge._wire_ext = frozenset()
+        wire = json.loads(port_bridge.encode_result(pd.DataFrame({"a": [1, 2]})))
+        self.assertEqual(list(wire), ["__pandas_df__"])
+
+
+class WireToPythonTest(WireTestCase):
+
+    def test_deeply_nested_lists(self):
+        depth = 100_000
+        payload = [{"__bytes__": "YWI="}]
+        for _ in range(depth):
+            payload = [payload]
+        result = port_bridge.wire_to_python(payload)
+        for _ in range(depth):
+            self.assertEqual(len(result), 1)
+            result = result[0]
+        self.assertEqual(result, [b"ab"])
+
+    def test_deeply_nested_dicts(self):
+        depth = 100_000
+        payload = {"leaf": 1}
+        for _ in range(depth):
+            payload = {"next": payload}
+        result = port_bridge.wire_to_python(payload)
+        for _ in range(depth):
+            result = result["next"]
+        self.assertEqual(result, {"leaf": 1})
+
+    def test_markers_inside_containers(self):
+        payload = {"a": [1, {"b": {"__bytes__": "YWI="}}, {"__bytes__": ""}], "c": {"d": None}}
+        original = json.loads(json.dumps(payload))
+        result = port_bridge.wire_to_python(payload)
+        self.assertEqual(result, {"a": [1, {"b": b"ab"}, b""], "c": {"d": None}})
+        self.assertEqual(payload, original)
+
+    def test_marker_priority_with_several_keys(self):
+        port_bridge._inbound_buffers[0] = "frame"
+        self.assertEqual(port_bridge.wire_to_python({"extra": 1, "__bin_ref__": 0}), "frame")
+        # __bytes__ comes before __bin_ref__ in _WIRE_DECODERS, whatever the key order
+        self.assertEqual(port_bridge.wire_to_python({"__bin_ref__": 0, "__bytes__": "YWI="}), b"ab")
+
+    def test_plain_values(self):
+        for value in (None, 1, 2.5, "s", True, [], {}, {"__not_a_marker__": 1}):
+            with self.subTest(value=value):
+                self.assertEqual(port_bridge.wire_to_python(value), value)
+
+class EncodePathsTestCase(WireTestCase):
+    """Compares the orjson encoder with the stdlib fallback it shares python_to_wire with."""
+
+    def encode_both(self, value):
+        fast = json.loads(port_bridge.encode_result(value))
+        port_bridge.discard_encoded()
+        fallback = json.loads(port_bridge._stdlib_dumps(port_bridge.python_to_wire(value)))
+        return fast, fallback
+
+    def assert_encodes_to(self, value, expected):
+        for wrap in (lambda v: v, lambda v: [v], lambda v: {"k": v}):
+            fast, fallback = self.encode_both(wrap(value))
+            self.assertEqual(fast, wrap(expected))
+            self.assertEqual(fallback, wrap(expected))
+
+
+class NonFiniteFloatTest(EncodePathsTestCase):
+
+    def test_non_finite_floats_are_sent_as_null(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            with self.subTest(value=value):
+                self.assert_encodes_to(value, None)
+
+    def test_finite_floats_are_kept(self):
+        self.assert_encodes_to(1e308, 1e308)
+
+    def test_stdlib_fallback_output_is_strict_json(self):
+        # Wider than 64 bits: orjson rejects it and encode_result falls back
+        line = port_bridge.encode_result({"big": 2**70, "nan": float("nan"), "xs": (1.5, float("inf"))})
+        self.assertNotIn(b"NaN", line)
+        self.assertNotIn(b"Infinity", line)
+        self.assertEqual(json.loads(line), {"big": 2**70, "nan": None, "xs": [1.5, None]})
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+    def test_numpy_non_finite_scalars(self):
+        self.assert_encodes_to(np.float64("nan"), None)
+        self.assert_encodes_to(np.float32("-inf"), None)
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class NumpyScalarTest(EncodePathsTestCase):
+
+    def test_numbers(self):
+        self.assert_encodes_to(np.int8(-3), -3)
+        self.assert_encodes_to(np.uint64(2**64 - 1), 2**64 - 1)
+        self.assert_encodes_to(np.float32(0.5), 0.5)
+        self.assert_encodes_to(np.float16(1.5), 1.5)
+        self.assert_encodes_to(np.bool_(True), True)
+
+    def test_longdouble_is_sent_as_float(self):
+        self.assert_encodes_to(np.longdouble(2.25), 2.25)
+
+    def test_datetime_is_sent_as_str(self):
+        self.assert_encodes_to(np.datetime64("2024-01-02"), "2024-01-02")
+        self.assert_encodes_to(
+            np.datetime64("2024-01-02T03:04:05.123456789", "ns"), "2024-01-02T03:04:05.123456789"
+        )
+        self.assert_encodes_to(np.datetime64("NaT"), "NaT")
+
+    def test_timedelta_is_sent_as_str(self):
+        self.assert_encodes_to(np.timedelta64(5, "s"), "5 seconds")
+
+    def test_complex_is_sent_as_str(self):
+        self.assert_encodes_to(np.complex128(1 + 2j), "(1+2j)")
+
+    def test_bytes_and_str(self):
+        self.assert_encodes_to(np.bytes_(b"ab"), {"__bytes__": "YWI="})
+        self.assert_encodes_to(np.str_("ab"), "ab")
+
+    def test_every_scalar_type_is_dispatched(self):
+        for code in np.typecodes["All"]:
+            scalar_type = np.dtype(code).type
+            if scalar_type is np.object_:
+                continue
+            with self.subTest(type=scalar_type.__name__):
+                self.assertIs(port_bridge._WIRE_DISPATCH[scalar_type], port_bridge._wire_numpy_scalar)
+                dtype = np.dtype(code)
+                if dtype.kind in "Mm":
+                    dtype = np.dtype(f"{code}8[s]")
+                value = np.zeros(1, dtype=dtype)[0]
+                fast, fallback = self.encode_both([value])
+                self.assertEqual(fast, fallback)
+
+    def test_dispatch_and_isinstance_ladder_agree(self):
+        # Subclasses miss the exact-type table and take the isinstance ladder
+        for base, value in ((np.float64, 1.5), (np.int32, 7), (np.datetime64, "2024-01-02"), (np.bytes_, b"ab")):
+            with self.subTest(type=base.__name__):
+                subclass = type("Sub" + base.__name__, (base,), {})
+                self.assertNotIn(subclass, port_bridge._WIRE_DISPATCH)
+                self.assertEqual(port_bridge.python_to_wire(subclass(value)), port_bridge.python_to_wire(base(value)))
+
+    def test_scalars_match_array_elements(self):
+        for arr in (
+            np.array(["2024-01-02T03:04:05"], dtype="datetime64[s]"),
+            np.array([3], dtype="timedelta64[ms]"),
+            np.array([1 - 1j]),
+            np.array([b"xy"]),
+        ):
+            with self.subTest(dtype=arr.dtype):
+                wire = json.loads(port_bridge.encode_result(arr))
+                fast, fallback = self.encode_both(arr[0])
+                self.assertEqual([fast], wire["__numpy_array__"]["data"])
+                self.assertEqual([fallback], wire["__numpy_array__"]["data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+defmodule Zixir.Python.PortBridgeTest do
+  use ExUnit.Case, async: false
+
+  # The bridge script has its own unittest suite under test/python; run it
+  # with the same interpreter lookup as Zixir.Python.Worker.
+  @python_tests Path.expand("../../python", __DIR__)
+
+  @tag :python_integration
+  @tag timeout: 300_000
+  test "priv/python/port_bridge.py unittest suite passes" do
+    python_path = Application.get_env(:zixir, :python_path) ||
+                  System.find_executable("python3") ||
+                  System.find_executable("python")
+
+    if python_path do
+      {output, status} =
+        System.cmd(python_path, ["-m", "unittest", "discover", "-s", @python_tests],
+          stderr_to_stdout: true
+        )
+
+      assert status == 0, output
+    end
+  end
+end
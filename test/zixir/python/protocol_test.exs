@@ -16,5 +16,16 @@ defmodule Zixir.Python.ProtocolTest do
       line = "{\"error\": \"module not found\"}\n"
       assert {:error, "module not found"} == Zixir.Python.Protocol.decode_response(line)
     end
+
+    test "decode string numpy array response" do
+      line = ~s({"ok": {"__numpy_array__": {"dtype": "str", "shape": [2], "data": ["a", "b"]}}}\n)
+      assert {:ok, ["a", "b"]} == Zixir.Python.Protocol.decode_response(line)
+    end
+
+    test "decode bit-packed boolean numpy array response" do
+      # np.packbits([True, False, True]) == [0b10100000]
+      line = ~s({"ok": {"__numpy_array__": {"dtype": "b1", "shape": [3], "nbits": 3, "data": "oA=="}}}\n)
+      assert {:ok, [true, false, true]} == Zixir.Python.Protocol.decode_response(line)
+    end
   end
 end